@@ -16,11 +16,14 @@ import argparse
 import json
 import re
 import sys
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from pathlib import Path
 
 import pdfplumber
 
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})$')
+
 
 def parse_currency(value: str) -> float:
     """Parse currency string like '$ 1,234.56' or '$1,234.56' to float."""
@@ -46,9 +49,10 @@ def parse_quantity(value: str) -> int:
 def extract_date_from_filename(pdf_path: str) -> str:
     """Extract date from filename like 'pmix-senso-2025-06-14.pdf' -> '2025-06-14'."""
     filename = Path(pdf_path).stem
-    match = re.search(r'(\d{4}-\d{2}-\d{2})$', filename)
+    match = _DATE_RE.search(filename)
     if match:
-        return match.group(1)
+        # Interned: every record of the file shares this string
+        return sys.intern(match.group(1))
     raise ValueError(f"Could not extract date from filename: {filename}")
 
 
@@ -57,10 +61,15 @@ def find_data_table(pdf) -> list | None:
     Find the main data table in the PDF (old format only).
 
     Returns the combined table rows from all pages, or None if no data table found.
+    Gives up after the first page if it has no data table, since new-format PDFs
+    never do and extracting tables from every page is expensive.
     """
     all_rows = []
 
-    for page in pdf.pages:
+    for page_num, page in enumerate(pdf.pages, 1):
+        if page_num == 2 and not all_rows:
+            return None
+
         tables = page.extract_tables()
         for table in tables:
             if len(table) > 10:
@@ -95,16 +104,18 @@ def parse_from_table(table_rows: list, report_date: str, pdf_path: str, verbose:
 
         cell0 = str(row[0] or '').strip()
         cell1 = str(row[1] or '').strip() if row[1] else ''
+        # First line of a multi-line cell; sep is empty when there is no newline
+        head, sep, tail = cell0.partition('\n')
 
         # Skip header rows and extract embedded category
         if 'Menu Group' in cell0 or 'Category' in cell0:
             # Check for embedded primary category in header row
             # Format: "Category Item\n(Beer)" or "Category\n(Food)"
-            if '\n' in cell0:
-                for part in cell0.split('\n'):
+            if sep:
+                for part in (head, *tail.split('\n')):
                     part = part.strip()
-                    if part.startswith('(') and part.endswith(')'):
-                        current_primary_category = part
+                    if part and part[0] == '(' and part[-1] == ')':
+                        current_primary_category = sys.intern(part)
                         if verbose:
                             print(f"    Primary category (from header): {current_primary_category}", file=sys.stderr)
                         break
@@ -112,19 +123,17 @@ def parse_from_table(table_rows: list, report_date: str, pdf_path: str, verbose:
 
         # Check for category headers embedded in cell0
         # Format: "(Category)\nsubcategory item..." or just "(Category)"
-        if '\n' in cell0 and cell0.startswith('('):
-            # Split embedded header
-            parts = cell0.split('\n', 1)
-            header_part = parts[0].strip()
-            if header_part.startswith('(') and header_part.endswith(')'):
-                current_primary_category = header_part
+        if sep and cell0[0] == '(':
+            header_part = head.strip()
+            if header_part and header_part[0] == '(' and header_part[-1] == ')':
+                current_primary_category = sys.intern(header_part)
                 if verbose:
                     print(f"    Primary category (embedded): {current_primary_category}", file=sys.stderr)
             continue
 
         # Primary category header row - starts and ends with parentheses
-        if cell0.startswith('(') and cell0.endswith(')'):
-            current_primary_category = cell0
+        if cell0 and cell0[0] == '(' and cell0[-1] == ')':
+            current_primary_category = sys.intern(cell0)
             if verbose:
                 print(f"    Primary category: {current_primary_category}", file=sys.stderr)
             continue
@@ -169,8 +178,8 @@ def parse_from_table(table_rows: list, report_date: str, pdf_path: str, verbose:
             "category": category,
             "item_name": item_name,
             "quantity_sold": qty,
-            "net_sales": round(net_sales, 2),
-            "discount": round(discount, 2),
+            "net_sales": net_sales,
+            "discount": discount,
             "data_source": f"pmix-pdf:{Path(pdf_path).name}"
         }
         records.append(record)
@@ -192,16 +201,27 @@ def parse_from_words(pdf, report_date: str, pdf_path: str, verbose: bool = False
     current_primary_category = None
     grand_total_from_pdf = None
 
+    # Per-page working structures, reused (cleared) across pages
+    rows_by_y = defaultdict(list)
+    data_rows = []
+    category_band = {}
+    item_band = {}
+
     for page_num, page in enumerate(pdf.pages, 1):
-        words = page.extract_words()
+        rows_by_y.clear()
+        data_rows.clear()
+        category_band.clear()
+        item_band.clear()
+
+        # Default tolerances define the column bands below; only plain word
+        # text and positions are needed, so no extra char attributes
+        words = page.extract_words(keep_blank_chars=False, use_text_flow=False, extra_attrs=[])
 
         # Group words by y position
-        rows_by_y = defaultdict(list)
         for w in words:
             rows_by_y[w['top']].append(w)
 
         # Find data rows (have numeric qty in x range 185-220)
-        data_rows = []
         for y, row_words in sorted(rows_by_y.items()):
             has_qty = any(
                 w['text'].isdigit() and 185 <= w['x0'] < 220
@@ -213,25 +233,30 @@ def parse_from_words(pdf, report_date: str, pdf_path: str, verbose: bool = False
         if verbose:
             print(f"  Page {page_num}: {len(data_rows)} data rows", file=sys.stderr)
 
+        # Bucket each y position's words into the category/item x bands once,
+        # so data rows only look at the y positions inside their window
+        sorted_ys = sorted(rows_by_y)
+        for other_y in sorted_ys:
+            category_band[other_y] = [(other_y, w['x0'], w['text']) for w in rows_by_y[other_y] if w['x0'] < 85]
+            item_band[other_y] = [(other_y, w['x0'], w['text']) for w in rows_by_y[other_y] if 85 <= w['x0'] < 185]
+
         # Process each data row
         for y, row_words in data_rows:
+            nearby_ys = sorted_ys[bisect_left(sorted_ys, y - 15):bisect_right(sorted_ys, y + 15)]
+
             # Get category text (x < 85, including nearby y positions ±10)
             category_words = []
-            for other_y, other_words in rows_by_y.items():
+            for other_y in nearby_ys:
                 if abs(other_y - y) <= 10:
-                    for w in other_words:
-                        if w['x0'] < 85:
-                            category_words.append((other_y, w['x0'], w['text']))
+                    category_words.extend(category_band[other_y])
             category_words.sort()  # Sort by y then x
             category_text = ' '.join(w[2] for w in category_words).strip()
 
             # Get item name (x 85-185, including nearby y positions ±15)
             item_words = []
-            for other_y, other_words in rows_by_y.items():
+            for other_y in nearby_ys:
                 if abs(other_y - y) <= 15:
-                    for w in other_words:
-                        if 85 <= w['x0'] < 185:
-                            item_words.append((other_y, w['x0'], w['text']))
+                    item_words.extend(item_band[other_y])
             item_words.sort()  # Sort by y then x
             item_name = ' '.join(w[2] for w in item_words).strip()
 
@@ -246,18 +271,17 @@ def parse_from_words(pdf, report_date: str, pdf_path: str, verbose: bool = False
                     currency_words.append(w['text'])
 
             # New format: [Refunds, Net Sales, Avg Price, Discount]
-            refunds = parse_currency(currency_words[0]) if len(currency_words) > 0 else 0.0
+            # Only Net Sales and Discount are stored; discount is parsed once
+            # the row is known to be an item row
             net_sales = parse_currency(currency_words[1]) if len(currency_words) > 1 else 0.0
-            avg_price = parse_currency(currency_words[2]) if len(currency_words) > 2 else 0.0
-            discount = parse_currency(currency_words[3]) if len(currency_words) > 3 else 0.0
 
             # Check for 100% category sales (indicates category header or subtotal)
             pct_words = [w['text'] for w in row_words if w['text'] == '100.00' and w['x0'] > 500]
             is_category_header = len(pct_words) > 0
 
             # Primary category header detection (starts with parentheses)
-            if category_text.startswith('(') and category_text.endswith(')'):
-                current_primary_category = category_text
+            if category_text and category_text[0] == '(' and category_text[-1] == ')':
+                current_primary_category = sys.intern(category_text)
                 if verbose:
                     print(f"    Primary category: {current_primary_category}", file=sys.stderr)
                 continue
@@ -282,6 +306,7 @@ def parse_from_words(pdf, report_date: str, pdf_path: str, verbose: bool = False
                 continue
 
             # Regular item row
+            discount = parse_currency(currency_words[3]) if len(currency_words) > 3 else 0.0
             record = {
                 "report_date": report_date,
                 "location": "senso-sushi",
@@ -289,12 +314,15 @@ def parse_from_words(pdf, report_date: str, pdf_path: str, verbose: bool = False
                 "category": category_text,
                 "item_name": item_name,
                 "quantity_sold": qty,
-                "net_sales": round(net_sales, 2),
-                "discount": round(discount, 2),
+                "net_sales": net_sales,
+                "discount": discount,
                 "data_source": f"pmix-pdf:{Path(pdf_path).name}"
             }
             records.append(record)
 
+        # Release this page's parsed chars/objects before moving on
+        page.flush_cache()
+
     return records, grand_total_from_pdf
 
 
@@ -339,8 +367,12 @@ def validate_totals(records: list[dict], grand_total_from_pdf: float | None, ver
         print("Warning: No Grand Total found in PDF", file=sys.stderr)
         return True
 
-    calculated_total = sum(r["net_sales"] for r in records)
-    calculated_qty = sum(r["quantity_sold"] for r in records)
+    # Single pass over records for both totals
+    calculated_total = 0.0
+    calculated_qty = 0
+    for r in records:
+        calculated_total += r["net_sales"]
+        calculated_qty += r["quantity_sold"]
 
     if verbose:
         print(f"Calculated: {calculated_qty} items, ${calculated_total:.2f}", file=sys.stderr)
@@ -357,9 +389,9 @@ def validate_totals(records: list[dict], grand_total_from_pdf: float | None, ver
 def output_ndjson(records: list[dict], output_path: str | None = None):
     """Output records as newline-delimited JSON."""
     if output_path:
-        with open(output_path, "w") as f:
-            for record in records:
-                f.write(json.dumps(record) + "\n")
+        # 1 MiB buffer so the whole batch goes out in a few large writes
+        with open(output_path, "w", buffering=1 << 20) as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
         print(f"Wrote {len(records)} records to {output_path}", file=sys.stderr)
     else:
         for record in records:
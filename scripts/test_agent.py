@@ -21,46 +21,132 @@ Usage:
     # Limit to first N questions
     python scripts/test_agent.py --stress-test --grouped --log --limit 10
 
+    # Run stress test batches in parallel (4 conversations at a time)
+    python scripts/test_agent.py --stress-test --concurrency 4
+
     # List available agents
     python scripts/test_agent.py --list-agents
 """
 
 import argparse
+import atexit
 import json
 import re
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import NamedTuple
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
+import google.auth
 from google.cloud import geminidataanalytics
 from google.api_core import exceptions as google_exceptions
+from google.api_core import retry as retries
+from google.protobuf.json_format import MessageToDict
 
 # Default project ID - can be overridden with --project
 DEFAULT_PROJECT_ID = "fdsanalytics"
 
+# Interactive mode input history
+HISTORY_FILE = Path.home() / ".test_agent_history"
+HISTORY_LENGTH = 1000
+
+# Questions per conversation in the non-grouped stress test
+STRESS_BATCH_SIZE = 10
+
+# Question files larger than this are streamed line by line instead of read whole
+STREAM_THRESHOLD_BYTES = 1 << 20
+
+# Shared gRPC channel options: unlimited message sizes (as the generated
+# transports use by default) plus keepalive pings so the connection survives
+# the idle gaps between stress test questions
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
 # ANSI colors for terminal output
-class Colors:
-    HEADER = '\033[95m'
-    BLUE = '\033[94m'
-    CYAN = '\033[96m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    DIM = '\033[2m'
+@dataclass(frozen=True, slots=True)
+class ColorPalette:
+    HEADER: str = '\033[95m'
+    BLUE: str = '\033[94m'
+    CYAN: str = '\033[96m'
+    GREEN: str = '\033[92m'
+    YELLOW: str = '\033[93m'
+    RED: str = '\033[91m'
+    ENDC: str = '\033[0m'
+    BOLD: str = '\033[1m'
+    DIM: str = '\033[2m'
+
+
+COLORS_ON = ColorPalette()
+COLORS_OFF = ColorPalette(*('' for _ in fields(ColorPalette)))
+
+# Active palette - main() switches to COLORS_OFF for --no-color or non-TTY output
+Colors = COLORS_ON
+
+
+def build_retry(max_wait=30.0, timeout=300.0, idempotent=True):
+    """Build the retry policy for transient API errors (rate limits, overload, timeouts).
+
+    Backoff starts at 1s and doubles up to max_wait; api_core randomizes each
+    sleep (full jitter) so concurrent workers don't retry in lockstep.
+    Non-idempotent calls don't retry DeadlineExceeded: the server may already
+    have accepted the request, and resending it would duplicate the turn.
+    """
+    retryable = [google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable]
+    if idempotent:
+        retryable.append(google_exceptions.DeadlineExceeded)
+    return retries.Retry(
+        predicate=retries.if_exception_type(*retryable),
+        initial=1.0,
+        maximum=max_wait,
+        multiplier=2.0,
+        timeout=timeout,
+    )
+
+
+# Retry policies - replaced from CLI flags in main(). chat isn't idempotent
+# (a resent question lands in the conversation twice), so it gets its own
+api_retry = build_retry()
+chat_retry = build_retry(idempotent=False)
+
+
+def make_clients():
+    """Create the agent and chat clients on a single shared gRPC channel.
+
+    All calls multiplex over one HTTP/2 connection instead of each client
+    opening its own, so the TCP/TLS handshake is paid once per run. ADC is
+    resolved once and the same credentials (and cached token) back every call.
+    """
+    agent_transport_cls = geminidataanalytics.DataAgentServiceClient.get_transport_class("grpc")
+    chat_transport_cls = geminidataanalytics.DataChatServiceClient.get_transport_class("grpc")
+
+    credentials, _ = google.auth.default(scopes=chat_transport_cls.AUTH_SCOPES)
+    channel = chat_transport_cls.create_channel(
+        geminidataanalytics.DataChatServiceClient.DEFAULT_ENDPOINT,
+        credentials=credentials,
+        options=GRPC_CHANNEL_OPTIONS,
+    )
+    agent_client = geminidataanalytics.DataAgentServiceClient(transport=agent_transport_cls(channel=channel))
+    chat_client = geminidataanalytics.DataChatServiceClient(transport=chat_transport_cls(channel=channel))
+    return agent_client, chat_client
 
 
 def get_agents(client, project_id):
-    """List all available agents."""
+    """Return a pager over the available agents (pages are fetched lazily)."""
     request = geminidataanalytics.ListDataAgentsRequest(
         parent=f"projects/{project_id}/locations/global"
     )
-    return list(client.list_data_agents(request=request))
+    return client.list_data_agents(request=request)
 
 
 def create_conversation(client, project_id, agent_name):
@@ -72,11 +158,11 @@ def create_conversation(client, project_id, agent_name):
         parent=f"projects/{project_id}/locations/global",
         conversation=conversation,
     )
-    return client.create_conversation(request=request)
+    return client.create_conversation(request=request, retry=api_retry)
 
 
 def send_message(chat_client, project_id, agent_name, conversation_name, message_text):
-    """Send a message to the agent and return the response."""
+    """Send a message to the agent and yield response messages as they stream in."""
     user_msg = geminidataanalytics.Message(user_message={"text": message_text})
     convo_ref = geminidataanalytics.ConversationReference()
     convo_ref.conversation = conversation_name
@@ -88,74 +174,123 @@ def send_message(chat_client, project_id, agent_name, conversation_name, message
         conversation_reference=convo_ref,
     )
 
-    responses = []
-    for message in chat_client.chat(request=request):
-        responses.append(message)
-    return responses
+    yield from chat_client.chat(request=request, retry=chat_retry)
 
 
-def format_response(message, verbose=False):
-    """Format the agent response for CLI display."""
-    output = []
+# Fenced JSON chart spec and everything after it in a text part
+_JSON_FENCE_RE = re.compile(r'```json.*', re.DOTALL)
 
-    if hasattr(message, 'system_message'):
-        sys_msg = message.system_message
-
-        # Text response (the main answer)
-        if hasattr(sys_msg, 'text') and sys_msg.text:
-            text = sys_msg.text
-            # Handle proto TextMessage
-            if hasattr(text, 'text'):
-                output.append(text.text)
-            elif hasattr(text, 'parts') and text.parts:
-                # Extract text from parts, filtering out JSON chart specs
-                for part in text.parts:
-                    part_text = str(part) if part else ""
-                    # Skip JSON chart specifications
-                    if "```json" in part_text:
-                        part_text = part_text.split("```json")[0].strip()
-                    # Clean up the text
-                    part_text = part_text.strip().strip('"').strip("'")
-                    if part_text and len(part_text) > 5:
-                        output.append(f"\n{Colors.GREEN}{part_text}{Colors.ENDC}")
-            else:
-                text_str = str(text)
-                if text_str and text_str != "text {\n}":
-                    output.append(text_str)
 
-        # Generated SQL
-        if hasattr(sys_msg, 'data') and sys_msg.data:
-            data = sys_msg.data
-            if hasattr(data, 'generated_sql') and data.generated_sql:
-                output.append(f"\n{Colors.DIM}SQL:{Colors.ENDC}")
-                output.append(f"{Colors.CYAN}{data.generated_sql}{Colors.ENDC}")
-
-        # Chart/visualization - just note it exists
-        if hasattr(sys_msg, 'chart') and sys_msg.chart:
-            chart = sys_msg.chart
-            # Check if it has actual chart content
-            chart_str = str(chart)
-            if chart_str and len(chart_str) > 10:  # Has meaningful content
-                output.append(f"{Colors.YELLOW}[Chart generated]{Colors.ENDC}")
-
-        # Data table
-        if hasattr(sys_msg, 'data_table') and sys_msg.data_table:
-            table = sys_msg.data_table
-            rows = getattr(table, 'rows', None)
-            if rows:
-                output.append(f"\n{Colors.DIM}Data ({len(rows)} rows):{Colors.ENDC}")
-                for i, row in enumerate(rows[:10]):
-                    output.append(f"  {row}")
-                if len(rows) > 10:
-                    output.append(f"  ... and {len(rows) - 10} more rows")
+class FormattedResponse(NamedTuple):
+    """Display text for one streamed message plus the metadata callers log."""
+    text: str
+    sql: str = ""
+    has_chart: bool = False
+    row_count: int | None = None
+
 
-        # Verbose: show raw structure for debugging
-        if verbose and not output:
-            output.append(f"{Colors.DIM}{message}{Colors.ENDC}")
+_EMPTY_RESPONSE = FormattedResponse("")
 
-    return '\n'.join(str(o) for o in output) if output else ""
 
+def format_response(message, verbose=False):
+    """Format the agent response for CLI display.
+
+    Returns a FormattedResponse so callers get the generated SQL and chart
+    flag from the same pass over the message.
+    """
+    # Called once per streamed message: bind colors to locals once. The palette
+    # is all-or-nothing, so an empty endc means colors are off and whole-string
+    # values are appended as-is instead of being wrapped in empty codes
+    green, cyan, yellow, dim, endc = Colors.GREEN, Colors.CYAN, Colors.YELLOW, Colors.DIM, Colors.ENDC
+
+    # Presence checks ('field' in msg) instead of hasattr/getattr probing
+    if 'system_message' not in message:
+        return FormattedResponse(f"{dim}{message}{endc}") if verbose else _EMPTY_RESPONSE
+    sys_msg = message.system_message
+    # Skip empty (keepalive/ack) messages before doing any per-field work
+    if not (verbose or sys_msg._pb.ByteSize()):
+        return _EMPTY_RESPONSE
+
+    output = []
+    generated_sql = ""
+    has_chart = False
+    row_count = None
+
+    # Text response (the main answer)
+    if 'text' in sys_msg:
+        text = sys_msg.text
+        # Older TextMessage versions carried a single text field instead of parts
+        inner_text = getattr(text, 'text', None)
+        parts = text.parts
+        # Handle proto TextMessage
+        if inner_text is not None:
+            output.append(inner_text)
+        elif parts:
+            # Extract text from parts, filtering out JSON chart specs
+            for part in parts:
+                part_text = part or ""  # parts are plain strings
+                # Drop JSON chart specifications, then surrounding whitespace/quotes
+                part_text = _JSON_FENCE_RE.sub('', part_text, count=1).strip(' \t\n\r"\'')
+                if part_text and len(part_text) > 5:
+                    output.append(f"\n{green}{part_text}{endc}" if endc else "\n" + part_text)
+        else:
+            text_str = str(text)
+            if text_str and text_str != "text {\n}":
+                output.append(text_str)
+
+    if 'data' in sys_msg:
+        data = sys_msg.data
 
+        # Generated SQL
+        generated_sql = data.generated_sql
+        if generated_sql:
+            output.append(f"\n{dim}SQL:{endc}")
+            output.append(f"{cyan}{generated_sql}{endc}" if endc else generated_sql)
+
+        # Retrieved rows (DataResult: schema plus one Struct map per row)
+        if 'result' in data:
+            rows = data.result.data
+            if rows:
+                row_count = len(rows)
+                output.append(f"\n{dim}Data ({row_count} rows):{endc}")
+                # Map key order isn't guaranteed; print columns in schema order
+                names = [field.name for field in data.result.schema.fields]
+                output.append("  " + "\t".join(names))
+                # islice: no copy of the repeated field just to preview 10 rows
+                for row in islice(rows, 10):
+                    output.append("  " + "\t".join(str(row.get(name, "")) for name in names))
+                if row_count > 10:
+                    output.append(f"  ... and {row_count - 10} more rows")
+
+    # Chart/visualization - just note it exists. Only the result message
+    # carries a chart; the chart query that precedes it would double-report
+    if 'chart' in sys_msg and 'result' in sys_msg.chart:
+        has_chart = True
+        output.append(f"{yellow}[Chart generated]{endc}")
+
+    # Verbose: show raw structure for debugging
+    if verbose and not output:
+        output.append(f"{dim}{message}{endc}")
+
+    return FormattedResponse('\n'.join(output), generated_sql, has_chart, row_count)
+
+
+# Optional google-re2 (linear-time matching) for scanning large question files
+try:
+    import re2 as _question_re_engine
+except ImportError:
+    _question_re_engine = re
+
+# Numbered questions with quotes, e.g. 12. "What are our top sellers?"
+_QUESTION_RE = _question_re_engine.compile(r'\d+\.\s+"([^"]+)"')
+# Section headers or numbered questions at the start of a line, for the grouped loader
+_SECTION_OR_QUESTION_RE = _question_re_engine.compile(
+    r'(?m)^(?:## (?P<hdr>.+)$|\d+\.[^\S\n]+"(?P<q>[^"\n]+)")'
+)
+
+
+# Loaders are memoized per path and return tuples so cached results can't be mutated
+@lru_cache(maxsize=4)
 def load_stress_test_questions(file_path=None):
     """Load questions from the stress test markdown file."""
     if file_path is None:
@@ -163,18 +298,34 @@ def load_stress_test_questions(file_path=None):
 
     if not file_path.exists():
         print(f"{Colors.RED}Stress test file not found: {file_path}{Colors.ENDC}")
-        return []
+        return ()
 
-    questions = []
     with open(file_path, 'r') as f:
         content = f.read()
 
-    # Extract numbered questions with quotes
-    pattern = r'\d+\.\s+"([^"]+)"'
-    matches = re.findall(pattern, content)
-    return matches
+    return tuple(_QUESTION_RE.findall(content))
 
 
+def _iter_section_or_question_matches(file_path):
+    """Yield header/question matches from a question file.
+
+    Small files are scanned with one finditer pass over the whole content;
+    files over STREAM_THRESHOLD_BYTES are matched line by line so only one
+    line is held in memory at a time.
+    """
+    if file_path.stat().st_size > STREAM_THRESHOLD_BYTES:
+        with open(file_path, 'r', buffering=1 << 16) as f:
+            for line in f:
+                match = _SECTION_OR_QUESTION_RE.match(line)
+                if match:
+                    yield match
+    else:
+        with open(file_path, 'r') as f:
+            content = f.read()
+        yield from _SECTION_OR_QUESTION_RE.finditer(content)
+
+
+@lru_cache(maxsize=4)
 def load_stress_test_questions_grouped(file_path=None):
     """Load questions from markdown file, grouped by section headers."""
     if file_path is None:
@@ -182,36 +333,29 @@ def load_stress_test_questions_grouped(file_path=None):
 
     if not file_path.exists():
         print(f"{Colors.RED}Stress test file not found: {file_path}{Colors.ENDC}")
-        return []
-
-    with open(file_path, 'r') as f:
-        content = f.read()
+        return ()
 
     groups = []
     current_section = None
     current_questions = []
 
-    for line in content.split('\n'):
-        # Check for section headers (## Header)
-        header_match = re.match(r'^## (.+)$', line)
-        if header_match:
+    # Each match is either a header or a question
+    for match in _iter_section_or_question_matches(file_path):
+        header = match.group('hdr')
+        if header is not None:
             # Save previous section
             if current_section and current_questions:
-                groups.append((current_section, current_questions))
-            current_section = header_match.group(1).strip()
+                groups.append((current_section, tuple(current_questions)))
+            current_section = header.strip()
             current_questions = []
-            continue
-
-        # Check for numbered questions with quotes
-        question_match = re.match(r'\d+\.\s+"([^"]+)"', line)
-        if question_match and current_section:
-            current_questions.append(question_match.group(1))
+        elif current_section:
+            current_questions.append(match.group('q'))
 
     # Save last section
     if current_section and current_questions:
-        groups.append((current_section, current_questions))
+        groups.append((current_section, tuple(current_questions)))
 
-    return groups
+    return tuple(groups)
 
 
 # Mixed-topic conversation to test context switching
@@ -238,6 +382,10 @@ def setup_logging(log_dir="logs"):
     return log_file
 
 
+# ANSI color escapes, stripped from file output
+_ANSI_RE = re.compile(r'\033\[[0-9;]*m')
+
+
 class LogWriter:
     """Writes to both console and file."""
     def __init__(self, log_file=None, use_colors=True):
@@ -245,7 +393,11 @@ class LogWriter:
         self.use_colors = use_colors
         self.file_handle = None
         if log_file:
-            self.file_handle = open(log_file, 'w', encoding='utf-8')
+            # Buffered: flushed at group boundaries and on close, not per write
+            self.file_handle = open(log_file, 'w', encoding='utf-8', buffering=1 << 16)
+        else:
+            # Console-only: bind a writer that skips the per-call file/color branching
+            self.write = self._write_colored if use_colors else self._write_plain
 
     def write(self, text, color=None):
         """Write text to console (with optional color) and file (plain)."""
@@ -257,22 +409,78 @@ class LogWriter:
 
         # File output without color
         if self.file_handle:
-            # Strip ANSI codes for file
-            plain_text = re.sub(r'\033\[[0-9;]*m', '', text)
-            self.file_handle.write(plain_text)
-            self.file_handle.flush()
+            # Color is passed separately, so text is usually plain already;
+            # only pre-colored text (e.g. format_response output) needs stripping
+            if '\033' in text:
+                text = _ANSI_RE.sub('', text)
+            self.file_handle.write(text)
+
+    def _write_plain(self, text, color=None):
+        print(text, end='')
+
+    def _write_colored(self, text, color=None):
+        print(f"{color}{text}{Colors.ENDC}" if color else text, end='')
 
     def writeln(self, text="", color=None):
         """Write text with newline."""
         self.write(text + "\n", color)
 
+    def flush(self):
+        """Push buffered file output to disk (e.g. after each group)."""
+        if self.file_handle:
+            self.file_handle.flush()
+
     def close(self):
         if self.file_handle:
             self.file_handle.close()
 
 
+class BufferedLog:
+    """Records LogWriter calls so a group run on a worker thread can be logged in one piece."""
+    def __init__(self):
+        self.entries = []
+
+    def write(self, text, color=None):
+        self.entries.append((text, color))
+
+    def writeln(self, text="", color=None):
+        self.write(text + "\n", color)
+
+    def replay(self, log):
+        """Write the recorded output to a LogWriter, in order."""
+        for text, color in self.entries:
+            log.write(text, color)
+
+
+def enable_line_editing():
+    """Give input() arrow-key editing and history persisted across sessions, where readline exists.
+
+    Returns True if readline is active.
+    """
+    try:
+        import readline
+    except ImportError:
+        return False  # Not available (e.g. Windows) - plain input() still works
+
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass  # No history yet
+    # Caps the file written at exit, so history doesn't grow without bound
+    readline.set_history_length(HISTORY_LENGTH)
+    atexit.register(readline.write_history_file, HISTORY_FILE)
+    return True
+
+
 def interactive_mode(chat_client, agent_client, project_id, agent, verbose=False):
     """Run interactive chat session."""
+    bold, endc = Colors.BOLD, Colors.ENDC
+    if enable_line_editing() and bold:
+        # Mark escapes as zero-width (\001...\002) so readline measures the prompt
+        # correctly when wrapping and recalling history
+        bold, endc = f"\001{bold}\002", f"\001{endc}\002"
+    prompt = f"{bold}You:{endc} "
+
     print(f"\n{Colors.GREEN}Starting interactive session with: {agent.display_name}{Colors.ENDC}")
     print(f"{Colors.DIM}Type 'quit' or 'exit' to end, 'new' for new conversation{Colors.ENDC}\n")
 
@@ -281,7 +489,7 @@ def interactive_mode(chat_client, agent_client, project_id, agent, verbose=False
 
     while True:
         try:
-            user_input = input(f"{Colors.BOLD}You:{Colors.ENDC} ").strip()
+            user_input = input(prompt).strip()
         except (KeyboardInterrupt, EOFError):
             print("\nExiting...")
             break
@@ -300,10 +508,8 @@ def interactive_mode(chat_client, agent_client, project_id, agent, verbose=False
 
         try:
             print(f"\n{Colors.BLUE}Agent:{Colors.ENDC} ", end="", flush=True)
-            responses = send_message(chat_client, project_id, agent.name, conversation.name, user_input)
-
-            for response in responses:
-                formatted = format_response(response, verbose)
+            for response in send_message(chat_client, project_id, agent.name, conversation.name, user_input):
+                formatted = format_response(response, verbose).text
                 if formatted:
                     print(formatted)
             print()
@@ -314,8 +520,83 @@ def interactive_mode(chat_client, agent_client, project_id, agent, verbose=False
             print(f"{Colors.RED}Error: {e}{Colors.ENDC}\n")
 
 
-def run_stress_test(chat_client, agent_client, project_id, agent, limit=None, verbose=False):
-    """Run stress test questions against the agent."""
+def run_stress_batch(chat_client, project_id, agent, questions, first_num, total, verbose=False,
+                     emit=print, buffered=False, conversation=None):
+    """Run a batch of stress test questions in one conversation (new unless one is passed in).
+
+    Output lines go through ``emit`` so concurrent batches can buffer them.
+    With ``buffered``, each question's lines are joined and emitted as one block.
+    """
+    results = []
+    bold, red, endc = Colors.BOLD, Colors.RED, Colors.ENDC
+    if conversation is None:
+        conversation = create_conversation(chat_client, project_id, agent.name)
+
+    for i, question in enumerate(questions, first_num):
+        lines = []
+        out = lines.append if buffered else emit
+
+        out(f"{bold}[{i}/{total}]{endc} {question}")
+        out("-" * 60)
+
+        try:
+            response_chunks = []
+            for response in send_message(chat_client, project_id, agent.name, conversation.name, question):
+                formatted = format_response(response, verbose).text
+                if formatted:
+                    response_chunks.append(formatted)
+                    out(formatted)
+
+            results.append({
+                "question": question,
+                "status": "success",
+                "response_length": sum(map(len, response_chunks))
+            })
+            out("")
+
+        except google_exceptions.GoogleAPICallError as e:
+            out(f"{red}API Error: {e}{endc}")
+            results.append({
+                "question": question,
+                "status": "api_error",
+                "error": str(e)
+            })
+        except Exception as e:
+            out(f"{red}Error: {e}{endc}")
+            results.append({
+                "question": question,
+                "status": "error",
+                "error": str(e)
+            })
+
+        out("")
+        if buffered:
+            emit('\n'.join(lines))
+
+    return results
+
+
+def write_block(text):
+    """Write a block of output lines to stdout with a single write call."""
+    sys.stdout.write(text + "\n")
+    sys.stdout.flush()
+
+
+def _run_stress_batch_buffered(*args, **kwargs):
+    """Run a stress test batch, returning (results, output lines) instead of printing."""
+    lines = []
+    results = run_stress_batch(*args, emit=lines.append, **kwargs)
+    return results, lines
+
+
+def run_stress_test(chat_client, agent_client, project_id, agent, limit=None, verbose=False, concurrency=1,
+                    buffered=False):
+    """Run stress test questions against the agent.
+
+    Questions run in batches of 10, each in its own conversation to avoid
+    context overflow. With concurrency > 1, batches run in parallel threads
+    and their output is printed in question order as each batch finishes.
+    """
     questions = load_stress_test_questions()
 
     if not questions:
@@ -327,65 +608,170 @@ def run_stress_test(chat_client, agent_client, project_id, agent, limit=None, ve
 
     print(f"\n{Colors.GREEN}Running {len(questions)} stress test questions against: {agent.display_name}{Colors.ENDC}\n")
 
+    total = len(questions)
+    batch_starts = range(0, total, STRESS_BATCH_SIZE)
     results = []
+
+    if concurrency <= 1:
+        # Double-buffer conversations: the next batch's conversation is created
+        # in the background while the current batch runs
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            next_conversation = prefetcher.submit(create_conversation, chat_client, project_id, agent.name)
+            for start in batch_starts:
+                conversation = next_conversation.result()
+                if start + STRESS_BATCH_SIZE < total:
+                    next_conversation = prefetcher.submit(create_conversation, chat_client, project_id, agent.name)
+                if start:
+                    print(f"{Colors.DIM}--- New conversation started ---{Colors.ENDC}\n")
+                results.extend(run_stress_batch(chat_client, project_id, agent,
+                                                questions[start:start + STRESS_BATCH_SIZE],
+                                                start + 1, total, verbose,
+                                                emit=write_block if buffered else print,
+                                                buffered=buffered, conversation=conversation))
+    else:
+        # No more workers than batches; extra threads would only sit idle
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, len(batch_starts)))
+        try:
+            futures = [
+                executor.submit(_run_stress_batch_buffered, chat_client, project_id, agent,
+                                questions[start:start + STRESS_BATCH_SIZE], start + 1, total, verbose,
+                                buffered=buffered)
+                for start in batch_starts
+            ]
+            # Futures are consumed in submission order to keep output ordered
+            for n, future in enumerate(futures):
+                batch_results, lines = future.result()
+                if n:
+                    print(f"{Colors.DIM}--- New conversation started ---{Colors.ENDC}\n")
+                print('\n'.join(lines))
+                results.extend(batch_results)
+        except BaseException:
+            # Ctrl-C or a failed batch: drop queued batches rather than keep sending chats
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    # Summary
+    success = sum(1 for r in results if r["status"] == "success")
+    print(f"\n{Colors.BOLD}Summary:{Colors.ENDC}")
+    print(f"  Total: {len(results)}")
+    print(f"  {Colors.GREEN}Success: {success}{Colors.ENDC}")
+    print(f"  {Colors.RED}Failed: {len(results) - success}{Colors.ENDC}")
+
+    return results
+
+
+def run_question_group(chat_client, project_id, agent, group_idx, group_name, questions,
+                       first_num, total_questions, verbose, log):
+    """Run one stress test group in its own conversation, writing its output to ``log``."""
+    # Create new conversation for each group
     conversation = create_conversation(chat_client, project_id, agent.name)
 
-    for i, question in enumerate(questions, 1):
-        print(f"{Colors.BOLD}[{i}/{len(questions)}]{Colors.ENDC} {question}")
-        print("-" * 60)
+    log.writeln()
+    log.writeln(f"## {group_name} (Conversation {group_idx})", Colors.HEADER)
+    log.writeln("-" * 80)
+
+    results = []
+    for question_num, question in enumerate(questions, first_num):
+        log.writeln()
+        log.writeln(f"[{question_num}/{total_questions}] {question}", Colors.BOLD)
+        log.writeln("-" * 60)
 
         try:
-            responses = send_message(chat_client, project_id, agent.name, conversation.name, question)
+            response_parts = []
+            sql_text = ""
+            has_chart = False
+            row_count = None
 
-            response_text = ""
-            for response in responses:
+            for response in send_message(chat_client, project_id, agent.name,
+                                         conversation.name, question):
                 formatted = format_response(response, verbose)
-                if formatted:
-                    response_text += formatted
-                    print(formatted)
+                response_parts.append(formatted.text)
+                # SQL and chart flag for logging come from the same pass
+                sql_text = formatted.sql or sql_text
+                has_chart = has_chart or formatted.has_chart
+                if formatted.row_count is not None:
+                    row_count = formatted.row_count
+
+            response_text = "".join(response_parts)
+
+            # Write response
+            if sql_text:
+                log.writeln(f"SQL: {sql_text[:200]}{'...' if len(sql_text) > 200 else ''}", Colors.CYAN)
+            if response_text:
+                # Truncate very long responses for readability
+                display_text = response_text[:500] + "..." if len(response_text) > 500 else response_text
+                log.writeln(display_text, Colors.GREEN)
+            if has_chart:
+                log.writeln("[Chart generated]", Colors.YELLOW)
+
+            log.writeln("Status: SUCCESS", Colors.GREEN)
 
             results.append({
+                "group": group_name,
                 "question": question,
                 "status": "success",
-                "response_length": len(response_text)
+                "response_length": len(response_text),
+                "has_sql": bool(sql_text),
+                "has_chart": has_chart,
+                "row_count": row_count
             })
-            print()
 
         except google_exceptions.GoogleAPICallError as e:
-            print(f"{Colors.RED}API Error: {e}{Colors.ENDC}")
+            log.writeln(f"API Error: {e}", Colors.RED)
+            log.writeln("Status: FAILED", Colors.RED)
             results.append({
+                "group": group_name,
                 "question": question,
                 "status": "api_error",
                 "error": str(e)
             })
         except Exception as e:
-            print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
+            log.writeln(f"Error: {e}", Colors.RED)
+            log.writeln("Status: FAILED", Colors.RED)
             results.append({
+                "group": group_name,
                 "question": question,
                 "status": "error",
                 "error": str(e)
             })
 
-        print()
+    return results
 
-        # Create new conversation every 10 questions to avoid context overflow
-        if i % 10 == 0 and i < len(questions):
-            conversation = create_conversation(chat_client, project_id, agent.name)
-            print(f"{Colors.DIM}--- New conversation started ---{Colors.ENDC}\n")
 
-    # Summary
-    success = sum(1 for r in results if r["status"] == "success")
-    print(f"\n{Colors.BOLD}Summary:{Colors.ENDC}")
-    print(f"  Total: {len(results)}")
-    print(f"  {Colors.GREEN}Success: {success}{Colors.ENDC}")
-    print(f"  {Colors.RED}Failed: {len(results) - success}{Colors.ENDC}")
+# Optional orjson for faster JSONL result writes
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-    return results
+
+def _json_line(obj):
+    """Serialize obj as one compact JSON line (UTF-8 bytes)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def write_results(handle, results):
+    """Append result dicts to a binary JSONL results file (no-op without one)."""
+    if handle:
+        handle.writelines(map(_json_line, results))
+
+
+def _run_question_group_buffered(*args):
+    """Run a question group into a BufferedLog, returning (results, buffer)."""
+    buffer = BufferedLog()
+    return run_question_group(*args, buffer), buffer
 
 
 def run_stress_test_grouped(chat_client, agent_client, project_id, agent,
-                            limit=None, verbose=False, log_file=None):
-    """Run stress test with conversation-per-group strategy and optional file logging."""
+                            limit=None, verbose=False, log_file=None, concurrency=1):
+    """Run stress test with conversation-per-group strategy and optional file logging.
+
+    With concurrency > 1, groups run in parallel threads (questions within a
+    group stay sequential to preserve conversation context).
+    """
     start_time = datetime.now()
 
     # Setup logging
@@ -393,7 +779,7 @@ def run_stress_test_grouped(chat_client, agent_client, project_id, agent,
     log = LogWriter(log_file=log_file, use_colors=use_colors)
 
     # Load grouped questions
-    groups = load_stress_test_questions_grouped()
+    groups = list(load_stress_test_questions_grouped())
     if not groups:
         log.writeln("No question groups found in stress test file", Colors.RED)
         log.close()
@@ -426,124 +812,90 @@ def run_stress_test_grouped(chat_client, agent_client, project_id, agent,
     log.writeln(f"Conversation Groups: {len(groups)}")
     if log_file:
         log.writeln(f"Log File: {log_file}")
+        # Machine-readable results alongside the transcript, one JSON object per question
+        results_file = Path(log_file).with_suffix('.jsonl')
+        results_handle = open(results_file, 'wb', buffering=1 << 16)
+        log.writeln(f"Results File: {results_file}")
+    else:
+        results_handle = None
     log.writeln("=" * 80)
     log.writeln()
 
-    results = []
-    question_num = 0
+    # First question number of each group, so numbering runs across groups
+    first_nums = []
+    next_num = 1
+    for _, questions in groups:
+        first_nums.append(next_num)
+        next_num += len(questions)
 
-    for group_idx, (group_name, questions) in enumerate(groups, 1):
-        # Create new conversation for each group
-        conversation = create_conversation(chat_client, project_id, agent.name)
-
-        log.writeln()
-        log.writeln(f"## {group_name} (Conversation {group_idx})", Colors.HEADER)
-        log.writeln("-" * 80)
-
-        for q_idx, question in enumerate(questions, 1):
-            question_num += 1
-            log.writeln()
-            log.writeln(f"[{question_num}/{total_questions}] {question}", Colors.BOLD)
-            log.writeln("-" * 60)
+    group_args = [
+        (chat_client, project_id, agent, group_idx, group_name, questions, first_num, total_questions, verbose)
+        for group_idx, ((group_name, questions), first_num) in enumerate(zip(groups, first_nums), 1)
+    ]
 
+    # Close the log and results file even on Ctrl-C so what was written is kept
+    try:
+        results = []
+        if concurrency <= 1:
+            for args in group_args:
+                group_results = run_question_group(*args, log)
+                write_results(results_handle, group_results)
+                log.flush()
+                results.extend(group_results)
+        else:
+            # Groups are independent conversations; each buffers its own output,
+            # which is replayed in group order so the log matches a sequential run
+            executor = ThreadPoolExecutor(max_workers=min(concurrency, len(group_args)))
             try:
-                responses = send_message(chat_client, project_id, agent.name,
-                                        conversation.name, question)
-
-                response_text = ""
-                sql_text = ""
-                has_chart = False
-
-                for response in responses:
-                    formatted = format_response(response, verbose)
-                    if formatted:
-                        response_text += formatted
-
-                    # Extract SQL for logging
-                    if hasattr(response, 'system_message'):
-                        sys_msg = response.system_message
-                        if hasattr(sys_msg, 'data') and sys_msg.data:
-                            if hasattr(sys_msg.data, 'generated_sql') and sys_msg.data.generated_sql:
-                                sql_text = sys_msg.data.generated_sql
-                        if hasattr(sys_msg, 'chart') and sys_msg.chart:
-                            chart_str = str(sys_msg.chart)
-                            if chart_str and len(chart_str) > 10:
-                                has_chart = True
-
-                # Write response
-                if sql_text:
-                    log.writeln(f"SQL: {sql_text[:200]}{'...' if len(sql_text) > 200 else ''}", Colors.CYAN)
-                if response_text:
-                    # Truncate very long responses for readability
-                    display_text = response_text[:500] + "..." if len(response_text) > 500 else response_text
-                    log.writeln(display_text, Colors.GREEN)
-                if has_chart:
-                    log.writeln("[Chart generated]", Colors.YELLOW)
-
-                log.writeln("Status: SUCCESS", Colors.GREEN)
-
-                results.append({
-                    "group": group_name,
-                    "question": question,
-                    "status": "success",
-                    "response_length": len(response_text),
-                    "has_sql": bool(sql_text),
-                    "has_chart": has_chart
-                })
-
-            except google_exceptions.GoogleAPICallError as e:
-                log.writeln(f"API Error: {e}", Colors.RED)
-                log.writeln("Status: FAILED", Colors.RED)
-                results.append({
-                    "group": group_name,
-                    "question": question,
-                    "status": "api_error",
-                    "error": str(e)
-                })
-            except Exception as e:
-                log.writeln(f"Error: {e}", Colors.RED)
-                log.writeln("Status: FAILED", Colors.RED)
-                results.append({
-                    "group": group_name,
-                    "question": question,
-                    "status": "error",
-                    "error": str(e)
-                })
-
-    # Summary
-    end_time = datetime.now()
-    duration = end_time - start_time
-
-    success = sum(1 for r in results if r["status"] == "success")
-    failed = [r for r in results if r["status"] != "success"]
-
-    log.writeln()
-    log.writeln("=" * 80)
-    log.writeln("SUMMARY", Colors.BOLD)
-    log.writeln("=" * 80)
-    log.writeln(f"Total: {len(results)}")
-    log.writeln(f"Success: {success}", Colors.GREEN)
-    log.writeln(f"Failed: {len(failed)}", Colors.RED if failed else None)
-    log.writeln(f"Duration: {duration}")
+                futures = [executor.submit(_run_question_group_buffered, *args) for args in group_args]
+                for future in futures:
+                    group_results, buffer = future.result()
+                    buffer.replay(log)
+                    write_results(results_handle, group_results)
+                    log.flush()
+                    results.extend(group_results)
+            except BaseException:
+                # Ctrl-C or a failed group: drop queued groups rather than keep sending chats
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+
+        # Summary
+        end_time = datetime.now()
+        duration = end_time - start_time
+
+        success = sum(1 for r in results if r["status"] == "success")
+        failed = [r for r in results if r["status"] != "success"]
 
-    if failed:
-        log.writeln()
-        log.writeln("Failed questions:", Colors.RED)
-        for r in failed:
-            log.writeln(f"  - [{r['group']}] {r['question']}")
-            if 'error' in r:
-                log.writeln(f"    Error: {r['error'][:100]}")
-
-    # Questions with SQL that used daily_summary (for verification)
-    daily_summary_questions = [r for r in results if r.get('has_sql') and 'daily_summary' in str(r)]
-    if daily_summary_questions:
         log.writeln()
-        log.writeln("Note: Check SQL in Weather Correlations group for ai.daily_summary usage")
-
-    log.writeln()
-    log.writeln("=" * 80)
+        log.writeln("=" * 80)
+        log.writeln("SUMMARY", Colors.BOLD)
+        log.writeln("=" * 80)
+        log.writeln(f"Total: {len(results)}")
+        log.writeln(f"Success: {success}", Colors.GREEN)
+        log.writeln(f"Failed: {len(failed)}", Colors.RED if failed else None)
+        log.writeln(f"Duration: {duration}")
+
+        if failed:
+            log.writeln()
+            log.writeln("Failed questions:", Colors.RED)
+            for r in failed:
+                log.writeln(f"  - [{r['group']}] {r['question']}")
+                if 'error' in r:
+                    log.writeln(f"    Error: {r['error'][:100]}")
+
+        # Questions with SQL that used daily_summary (for verification)
+        daily_summary_questions = [r for r in results if r.get('has_sql') and 'daily_summary' in str(r)]
+        if daily_summary_questions:
+            log.writeln()
+            log.writeln("Note: Check SQL in Weather Correlations group for ai.daily_summary usage")
 
-    log.close()
+        log.writeln()
+        log.writeln("=" * 80)
+    finally:
+        log.close()
+        if results_handle:
+            results_handle.close()
 
     return results
 
@@ -558,6 +910,7 @@ Examples:
   %(prog)s "What are top sellers?"      # Single query
   %(prog)s --stress-test                # Run all stress test questions
   %(prog)s --stress-test --limit 5      # Run first 5 questions only
+  %(prog)s --stress-test -c 4           # Run 4 conversations in parallel
   %(prog)s --list-agents                # List available agents
         """
     )
@@ -569,70 +922,84 @@ Examples:
     parser.add_argument("--list-agents", "-l", action="store_true", help="List available agents and exit")
     parser.add_argument("--stress-test", "-s", action="store_true", help="Run stress test questions")
     parser.add_argument("--limit", "-n", type=int, help="Limit number of stress test questions")
+    parser.add_argument("--concurrency", "-c", type=int, default=1,
+                        help="Number of stress test conversations to run in parallel (default: 1)")
+    parser.add_argument("--buffered", action="store_true",
+                        help="Write each stress test question's output in one block (faster when piped)")
     parser.add_argument("--grouped", "-g", action="store_true",
                         help="Group questions by category (one conversation per group)")
     parser.add_argument("--log", "-o", action="store_true",
                         help="Log output to timestamped file in logs/")
+    parser.add_argument("--retry-max-wait", type=float, default=30.0,
+                        help="Max seconds between retries of transient API errors (default: 30)")
+    parser.add_argument("--retry-timeout", type=float, default=300.0,
+                        help="Give up retrying a call after this many seconds (default: 300)")
     parser.add_argument("--no-color", action="store_true", help="Disable colored output")
     parser.add_argument("--verbose", "-v", action="store_true", help="Show verbose output including raw messages")
 
     args = parser.parse_args()
 
+    global api_retry, chat_retry, Colors
+    api_retry = build_retry(args.retry_max_wait, args.retry_timeout)
+    chat_retry = build_retry(args.retry_max_wait, args.retry_timeout, idempotent=False)
+
     # Disable colors if requested or not a TTY
-    if args.no_color or not sys.stdout.isatty():
-        for attr in dir(Colors):
-            if not attr.startswith('_'):
-                setattr(Colors, attr, '')
+    Colors = COLORS_OFF if args.no_color or not sys.stdout.isatty() else COLORS_ON
 
     # Initialize clients
     try:
-        agent_client = geminidataanalytics.DataAgentServiceClient()
-        chat_client = geminidataanalytics.DataChatServiceClient()
+        agent_client, chat_client = make_clients()
     except Exception as e:
         print(f"{Colors.RED}Failed to initialize clients: {e}{Colors.ENDC}")
         print(f"{Colors.DIM}Make sure you've run: gcloud auth application-default login{Colors.ENDC}")
         sys.exit(1)
 
-    # List agents
+    # Agents are streamed from the pager, so API errors can surface while iterating
     try:
         agents = get_agents(agent_client, args.project)
+
+        # Just list agents, printing each page as it arrives
+        if args.list_agents:
+            listed = 0
+            for agent in agents:
+                if not listed:
+                    print(f"\n{Colors.BOLD}Available agents in {args.project}:{Colors.ENDC}\n")
+                listed += 1
+                name = getattr(agent, 'display_name', None) or agent.name.split('/')[-1]
+                print(f"  - {name}")
+                # One native proto -> dict conversion; unset fields are simply absent
+                agent_dict = MessageToDict(agent._pb, preserving_proto_field_name=True)
+                ctx = agent_dict.get('data_analytics_agent', {}).get('published_context', {})
+                ref_names = list(ctx.get('datasource_references', {}))
+                if ref_names:
+                    print(f"    {Colors.DIM}Datasources: {', '.join(ref_names)}{Colors.ENDC}")
+            if not listed:
+                print(f"{Colors.RED}No agents found in project {args.project}{Colors.ENDC}")
+                sys.exit(1)
+            print()
+            return
+
+        # Select agent: stop at the first name match, otherwise the last one listed
+        agent = None
+        seen_names = []
+        for candidate in agents:
+            if args.agent and getattr(candidate, 'display_name', '') == args.agent:
+                agent = candidate
+                break
+            seen_names.append(getattr(candidate, 'display_name', candidate.name.split('/')[-1]))
+            if not args.agent:
+                agent = candidate  # Most recently created ends up last
     except google_exceptions.GoogleAPICallError as e:
         print(f"{Colors.RED}Failed to list agents: {e}{Colors.ENDC}")
         sys.exit(1)
 
-    if not agents:
-        print(f"{Colors.RED}No agents found in project {args.project}{Colors.ENDC}")
-        sys.exit(1)
-
-    # Just list agents
-    if args.list_agents:
-        print(f"\n{Colors.BOLD}Available agents in {args.project}:{Colors.ENDC}\n")
-        for agent in agents:
-            name = getattr(agent, 'display_name', None) or agent.name.split('/')[-1]
-            print(f"  - {name}")
-            if hasattr(agent, 'data_analytics_agent'):
-                ctx = agent.data_analytics_agent.published_context
-                if hasattr(ctx, 'datasource_references'):
-                    try:
-                        refs = ctx.datasource_references
-                        # Proto objects need different access
-                        ref_names = [str(k) for k in refs._pb.keys()] if hasattr(refs, '_pb') else list(refs)
-                        if ref_names:
-                            print(f"    {Colors.DIM}Datasources: {', '.join(ref_names)}{Colors.ENDC}")
-                    except Exception:
-                        pass  # Skip if we can't extract datasource info
-        print()
-        return
-
-    # Select agent
-    if args.agent:
-        agent = next((a for a in agents if getattr(a, 'display_name', '') == args.agent), None)
-        if not agent:
+    if not agent:
+        if not seen_names:
+            print(f"{Colors.RED}No agents found in project {args.project}{Colors.ENDC}")
+        else:
             print(f"{Colors.RED}Agent '{args.agent}' not found{Colors.ENDC}")
-            print(f"Available: {', '.join(getattr(a, 'display_name', a.name.split('/')[-1]) for a in agents)}")
-            sys.exit(1)
-    else:
-        agent = agents[-1]  # Most recently created
+            print(f"Available: {', '.join(seen_names)}")
+        sys.exit(1)
 
     print(f"{Colors.DIM}Using agent: {getattr(agent, 'display_name', agent.name.split('/')[-1])}{Colors.ENDC}")
 
@@ -644,17 +1011,17 @@ Examples:
             if log_file:
                 print(f"{Colors.DIM}Logging to: {log_file}{Colors.ENDC}")
             run_stress_test_grouped(chat_client, agent_client, args.project, agent,
-                                   args.limit, args.verbose, log_file)
+                                   args.limit, args.verbose, log_file, args.concurrency)
         else:
             # Original mode (batch of 10)
-            run_stress_test(chat_client, agent_client, args.project, agent, args.limit, args.verbose)
+            run_stress_test(chat_client, agent_client, args.project, agent, args.limit, args.verbose,
+                            args.concurrency, args.buffered)
     elif args.query:
         # Single query mode
         conversation = create_conversation(chat_client, args.project, agent.name)
         try:
-            responses = send_message(chat_client, args.project, agent.name, conversation.name, args.query)
-            for response in responses:
-                formatted = format_response(response, args.verbose)
+            for response in send_message(chat_client, args.project, agent.name, conversation.name, args.query):
+                formatted = format_response(response, args.verbose).text
                 if formatted:
                     print(formatted)
         except Exception as e:
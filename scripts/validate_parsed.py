@@ -4,51 +4,92 @@ Validate parsed PMIX PDF data using Claude Code CLI.
 
 This script:
 1. Takes parsed records and the original PDF
-2. Extracts sample text from PDF for comparison
-3. Invokes Claude Code CLI for full validation review
-4. Logs results to validation_log.json
+2. Checks calculated totals against the PDF grand total (if given)
+3. Runs heuristic checks on the records (the Claude Code CLI review of the
+   PDF text is not wired up yet, so the PDF itself is not opened)
+4. Appends results to validation_log.ndjson (one JSON entry per line)
 
 Usage:
     python scripts/validate_parsed.py --records /tmp/parsed.json --pdf pmix/pmix-senso-2025-06-14.pdf
-    python scripts/validate_parsed.py --records /tmp/parsed.json --pdf pmix/pmix-senso-2025-06-14.pdf --log pmix/validation_log.json
+    python scripts/validate_parsed.py --records /tmp/parsed.json --pdf pmix/pmix-senso-2025-06-14.pdf --log pmix/validation_log.ndjson
+
+    # Validate a directory of PDFs, each next to its parsed <stem>.ndjson, in one process
+    python scripts/validate_parsed.py --batch-dir /tmp/pmix-batch
+
+    # Convert an old JSON-array log to NDJSON
+    python -c "from scripts.validate_parsed import migrate_log_to_ndjson; migrate_log_to_ndjson('pmix/validation_log.json')"
 """
 
 import argparse
 import json
 import os
+import re
 import subprocess
 import sys
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
-import pdfplumber
+# Optional orjson for faster JSON decoding/encoding; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson else json.loads
+
+
+def json_line(entry: dict) -> bytes:
+    """Encode one entry as a compact NDJSON line."""
+    if orjson:
+        # Non-str keys (e.g. a None primary_category) are stringified like stdlib json does
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS) + b'\n'
+    return json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+# Report date in PDF filenames, e.g. pmix-senso-2025-06-14
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+# Real menu items that are legitimately 2 characters or fewer
+_ALLOWED_SHORT_ITEMS = frozenset(('', 'GF', 'V'))
 
 
 def extract_pdf_summary(pdf_path: str, max_lines: int = 50) -> str:
     """Extract summary text from PDF for validation."""
+    # Imported here: only the (not yet wired up) Claude review needs the PDF,
+    # so heuristic and --batch-dir runs skip the pdfplumber import
+    import pdfplumber
+
     lines = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages[:2]:  # First 2 pages
+    # Only the first 2 pages are loaded; page 2 is skipped once page 1 fills max_lines
+    with pdfplumber.open(pdf_path, pages=[1, 2]) as pdf:
+        for page in pdf.pages:
             text = page.extract_text()
             if text:
-                lines.extend(text.split('\n')[:max_lines])
+                lines.extend(text.split('\n', max_lines)[:max_lines])
+            if len(lines) >= max_lines:
+                break
     return '\n'.join(lines[:max_lines])
 
 
 def calculate_totals(records: list[dict]) -> dict:
-    """Calculate totals from parsed records."""
-    total_qty = sum(r.get('quantity_sold', 0) for r in records)
-    total_sales = sum(r.get('net_sales', 0) for r in records)
-    total_discount = sum(r.get('discount', 0) for r in records)
+    """Calculate totals from parsed records in a single pass."""
+    total_qty = 0
+    total_sales = 0
+    total_discount = 0
+    # Per-category [count, sales]
+    category_totals = defaultdict(lambda: [0, 0])
 
-    # Count by category
-    categories = {}
     for r in records:
-        cat = r.get('primary_category', 'Unknown')
-        if cat not in categories:
-            categories[cat] = {'count': 0, 'sales': 0}
-        categories[cat]['count'] += 1
-        categories[cat]['sales'] += r.get('net_sales', 0)
+        net_sales = r.get('net_sales', 0)
+        total_qty += r.get('quantity_sold', 0)
+        total_sales += net_sales
+        total_discount += r.get('discount', 0)
+        cat = category_totals[r.get('primary_category', 'Unknown')]
+        cat[0] += 1
+        cat[1] += net_sales
+
+    categories = {k: {'count': count, 'sales': sales} for k, (count, sales) in category_totals.items()}
 
     return {
         'record_count': len(records),
@@ -59,15 +100,38 @@ def calculate_totals(records: list[dict]) -> dict:
     }
 
 
+def find_suspicious_records(records: list[dict]) -> list[str]:
+    """Heuristic checks on a sample of records; returns a list of issues."""
+    issues = []
+    sample_records = records[:10]
+    # category -> has duplicate words; sampled rows mostly share a few categories
+    cat_has_dup = {}
+    for r in sample_records:
+        item = r.get('item_name', '')
+        cat = r.get('category', '')
+        # Check for obviously wrong item names (single characters, fragments)
+        if len(item) <= 2 and item not in _ALLOWED_SHORT_ITEMS:
+            issues.append(f"Suspicious item name: '{item}' in category '{cat}'")
+        # Check for duplicate words in category
+        has_dup = cat_has_dup.get(cat)
+        if has_dup is None:
+            cat_words = cat.split()
+            has_dup = cat_has_dup[cat] = len(cat_words) != len(set(cat_words))
+        if has_dup:
+            issues.append(f"Duplicate words in category: '{cat}'")
+    return issues
+
+
 def validate_with_claude(pdf_path: str, records: list[dict], pdf_total: float | None) -> dict:
     """
     Validate parsed data using Claude Code CLI.
 
+    Only the heuristic checks run for now, so the PDF itself is not opened.
+
     Returns:
         dict with 'status' ('approved' or 'flagged'), 'issues' list, and 'details'
     """
     totals = calculate_totals(records)
-    pdf_text = extract_pdf_summary(pdf_path)
 
     # Check basic total match first
     issues = []
@@ -76,21 +140,14 @@ def validate_with_claude(pdf_path: str, records: list[dict], pdf_total: float |
         if diff > 1.00:
             issues.append(f"Total mismatch: calculated ${totals['total_sales']:.2f}, PDF shows ${pdf_total:.2f} (diff: ${diff:.2f})")
 
-    # Check for suspicious patterns
-    sample_records = records[:10]
-    for r in sample_records:
-        item = r.get('item_name', '')
-        cat = r.get('category', '')
-        # Check for obviously wrong item names (single characters, fragments)
-        if len(item) <= 2 and item not in ['', 'GF', 'V']:
-            issues.append(f"Suspicious item name: '{item}' in category '{cat}'")
-        # Check for duplicate words in category
-        cat_words = cat.split()
-        if len(cat_words) != len(set(cat_words)):
-            issues.append(f"Duplicate words in category: '{cat}'")
+    # A total mismatch already flags the file; only run the heuristics
+    # when the totals agree
+    if not issues:
+        issues = find_suspicious_records(records)
 
     # Build prompt for Claude CLI validation (optional - for deep review)
-    # For now, use heuristic validation only
+    # For now, use heuristic validation only; extract_pdf_summary(pdf_path)
+    # supplies the PDF text once that review is wired up
 
     status = 'approved' if len(issues) == 0 else 'flagged'
 
@@ -108,16 +165,31 @@ def validate_with_claude(pdf_path: str, records: list[dict], pdf_total: float |
 def load_records(records_path: str) -> list[dict]:
     """Load records from NDJSON file."""
     records = []
-    with open(records_path, 'r') as f:
+    # Binary lines go straight to the decoder (no str decode/strip per line)
+    with open(records_path, 'rb') as f:
         for line in f:
-            line = line.strip()
-            if line:
-                records.append(json.loads(line))
+            if not line.isspace():
+                records.append(json_loads(line))
     return records
 
 
 def append_to_log(log_path: str, entry: dict):
-    """Append validation entry to log file."""
+    """Append validation entry to log file.
+
+    NDJSON logs (the default) get one line appended per entry. Legacy .json
+    logs hold a single array and are rewritten whole on every append.
+    """
+    with ValidationLog(log_path) as log:
+        log.append(entry)
+
+
+def _is_legacy_log(log_path: str) -> bool:
+    """Legacy logs are a single JSON array (.json); anything else is NDJSON."""
+    return str(log_path).endswith('.json')
+
+
+def _append_to_json_array_log(log_path: str, entries: list[dict]):
+    """Append to a legacy JSON-array log by rewriting the whole file."""
     # Load existing log
     log_entries = []
     if os.path.exists(log_path):
@@ -127,57 +199,116 @@ def append_to_log(log_path: str, entry: dict):
             except json.JSONDecodeError:
                 log_entries = []
 
-    # Append new entry
-    log_entries.append(entry)
+    # Append new entries
+    log_entries.extend(entries)
+
+    # Encode before opening for write so an encoding error can't truncate the log
+    if orjson:
+        payload = orjson.dumps(log_entries, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(log_entries, indent=2).encode('utf-8')
 
     # Write back
-    with open(log_path, 'w') as f:
-        json.dump(log_entries, f, indent=2)
+    with open(log_path, 'wb') as f:
+        f.write(payload)
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Validate parsed PMIX PDF data"
-    )
-    parser.add_argument("--records", required=True, help="Path to parsed records NDJSON file")
-    parser.add_argument("--pdf", required=True, help="Path to original PDF file")
-    parser.add_argument("--pdf-total", type=float, help="Grand total from PDF (if known)")
-    parser.add_argument("--log", default="pmix/validation_log.json", help="Path to validation log")
-    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+class ValidationLog:
+    """
+    Validation log held open across a batch of appends.
 
-    args = parser.parse_args()
+    NDJSON logs are opened once in append mode and each entry is written as
+    it arrives; legacy .json logs collect entries and rewrite the array once
+    on exit.
+    """
 
-    # Load records
-    if not os.path.exists(args.records):
-        print(f"Error: Records file not found: {args.records}", file=sys.stderr)
-        sys.exit(1)
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.file_handle = None
+        self.pending = []
+
+    def __enter__(self):
+        if not _is_legacy_log(self.log_path):
+            self.file_handle = open(self.log_path, 'ab')
+        return self
+
+    def append(self, entry: dict):
+        if self.file_handle:
+            self.file_handle.write(json_line(entry))
+        else:
+            self.pending.append(entry)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.file_handle:
+            self.file_handle.close()
+        elif self.pending:
+            _append_to_json_array_log(self.log_path, self.pending)
+        return False
+
+
+def migrate_log_to_ndjson(json_log_path: str, ndjson_log_path: str | None = None) -> str:
+    """
+    Convert a legacy JSON-array validation log to NDJSON.
+
+    Writes next to the old log (same name, .ndjson) unless a path is given,
+    and refuses to overwrite an existing file. Returns the NDJSON path.
+    """
+    if ndjson_log_path is None:
+        ndjson_log_path = str(Path(json_log_path).with_suffix('.ndjson'))
 
-    records = load_records(args.records)
+    with open(json_log_path, 'r') as f:
+        entries = json.load(f)
+
+    with open(ndjson_log_path, 'xb') as f:
+        f.writelines(map(json_line, entries))
+
+    return ndjson_log_path
+
+
+def find_batch_pairs(batch_dir: str) -> list[tuple[str, str]]:
+    """
+    Pair each PDF in batch_dir with its parsed records (same stem, .ndjson or .json).
+
+    PDFs without a records file are reported and skipped.
+    """
+    pairs = []
+    for pdf_path in sorted(Path(batch_dir).glob('*.pdf')):
+        for suffix in ('.ndjson', '.json'):
+            records_path = pdf_path.with_suffix(suffix)
+            if records_path.exists():
+                pairs.append((str(records_path), str(pdf_path)))
+                break
+        else:
+            print(f"Warning: No records file for {pdf_path}, skipping", file=sys.stderr)
+    return pairs
+
+
+def validate_file(records_path: str, pdf_path: str, pdf_total: float | None = None,
+                  verbose: bool = False) -> dict | None:
+    """Validate one parsed records file against its PDF; returns the log entry or None if empty."""
+    records = load_records(records_path)
     if not records:
-        print("No records found in file", file=sys.stderr)
-        sys.exit(1)
+        print(f"No records found in {records_path}", file=sys.stderr)
+        return None
 
     # Extract date from PDF filename
-    pdf_name = Path(args.pdf).stem
-    date_match = None
-    import re
-    match = re.search(r'(\d{4}-\d{2}-\d{2})', pdf_name)
-    if match:
-        date_match = match.group(1)
+    pdf_name = Path(pdf_path).stem
+    match = _DATE_RE.search(pdf_name)
+    date_match = match.group(1) if match else None
 
     # Validate
-    result = validate_with_claude(args.pdf, records, args.pdf_total)
+    result = validate_with_claude(pdf_path, records, pdf_total)
 
     # Create log entry
     log_entry = {
         'date': date_match or 'unknown',
-        'pdf': args.pdf,
+        'pdf': pdf_path,
         'timestamp': datetime.now().isoformat(),
         **result
     }
 
     # Output result
-    if args.verbose:
+    if verbose:
         print(f"Date: {date_match}", file=sys.stderr)
         print(f"Status: {result['status']}", file=sys.stderr)
         print(f"Records: {result['record_count']}", file=sys.stderr)
@@ -189,6 +320,68 @@ def main():
             for issue in result['issues']:
                 print(f"  - {issue}", file=sys.stderr)
 
+    return log_entry
+
+
+def run_batch(batch_dir: str, log_path: str, verbose: bool = False) -> bool:
+    """
+    Validate every PDF/records pair in batch_dir in one process.
+
+    The log is opened once for the whole batch. Returns True if every
+    file was approved.
+    """
+    pairs = find_batch_pairs(batch_dir)
+    if not pairs:
+        print(f"No PDF/records pairs found in {batch_dir}", file=sys.stderr)
+        return False
+
+    all_approved = True
+    with ValidationLog(log_path) as log:
+        for records_path, pdf_path in pairs:
+            log_entry = validate_file(records_path, pdf_path, verbose=verbose)
+            if log_entry is None:
+                all_approved = False
+                continue
+            log.append(log_entry)
+            if log_entry['status'] != 'approved':
+                all_approved = False
+            # Print status to stdout, one line per file
+            print(json.dumps(log_entry))
+
+    return all_approved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate parsed PMIX PDF data"
+    )
+    parser.add_argument("--records", help="Path to parsed records NDJSON file")
+    parser.add_argument("--pdf", help="Path to original PDF file")
+    parser.add_argument("--pdf-total", type=float, help="Grand total from PDF (if known)")
+    parser.add_argument("--batch-dir",
+                        help="Validate every *.pdf in this directory against its <stem>.ndjson/.json records")
+    parser.add_argument("--log", default="pmix/validation_log.ndjson",
+                        help="Path to validation log (.ndjson appends a line; legacy .json rewrites an array)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+
+    args = parser.parse_args()
+
+    # Batch mode: exit 0 only if every file was approved
+    if args.batch_dir:
+        sys.exit(0 if run_batch(args.batch_dir, args.log, args.verbose) else 1)
+
+    if not (args.records and args.pdf):
+        parser.error("--records and --pdf are required unless --batch-dir is given")
+
+    # Load records
+    if not os.path.exists(args.records):
+        print(f"Error: Records file not found: {args.records}", file=sys.stderr)
+        sys.exit(1)
+
+    log_entry = validate_file(args.records, args.pdf, args.pdf_total, args.verbose)
+    if log_entry is None:
+        sys.exit(1)
+
     # Append to log
     append_to_log(args.log, log_entry)
 
@@ -196,7 +389,7 @@ def main():
     print(json.dumps(log_entry))
 
     # Exit code: 0 for approved, 1 for flagged
-    sys.exit(0 if result['status'] == 'approved' else 1)
+    sys.exit(0 if log_entry['status'] == 'approved' else 1)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
 import pandas as pd
 import json
-import copy
+from functools import lru_cache
 
-import proto
 from google.protobuf.json_format import MessageToDict
 
 import streamlit as st
@@ -13,14 +12,24 @@ import streamlit as st
 # Column Formatting
 # ============================================================================
 
-def detect_column_format(col_name):
-    """Detect format based on column name patterns."""
-    col = col_name.lower()
+# Column name endings that hold dollar amounts
+_DOLLAR_SUFFIXES = ('_sales', 'sales', '_revenue', '_discount', '_cost', '_price')
+# Their last characters (s/e/t): other columns can skip the suffix test
+_DOLLAR_LAST_CHARS = frozenset(s[-1] for s in _DOLLAR_SUFFIXES)
 
-    # Dollar patterns: ends with sales/revenue/discount/cost/price, or contains 'bound'
-    if any(col.endswith(s) for s in ('_sales', 'sales', '_revenue', '_discount', '_cost', '_price')):
+
+# Pure function of the column name; the same columns come back on every rerun
+@lru_cache(maxsize=512)
+def detect_column_format(col_name, col_lower=None):
+    """Detect format based on column name patterns (col_lower: precomputed col_name.lower())."""
+    col = col_lower or col_name.lower()
+    last = col[-1:]
+
+    # Dollar patterns: ends with sales/revenue/discount/cost/price (incl. predicted_sales),
+    # or contains 'bound'
+    if last in _DOLLAR_LAST_CHARS and col.endswith(_DOLLAR_SUFFIXES):
         return "$ %.2f"
-    if 'bound' in col or col == 'predicted_sales':  # forecast bounds
+    if 'bound' in col:  # forecast bounds
         return "$ %.2f"
 
     # Temperature patterns: contains 'temp'
@@ -28,7 +37,7 @@ def detect_column_format(col_name):
         return "%.1f°F"
 
     # Precipitation patterns: ends with '_in' (inches)
-    if col.endswith('_in'):
+    if last == 'n' and col.endswith('_in'):
         return '%.2f"'
 
     # Quantity patterns: contains quantity/count/sold/items
@@ -42,7 +51,7 @@ def build_column_config(df):
     """Build Streamlit column_config from DataFrame columns."""
     config = {}
     for col in df.columns:
-        fmt = detect_column_format(col)
+        fmt = detect_column_format(col, col.lower())
         if fmt:
             config[col] = st.column_config.NumberColumn(col, format=fmt)
     return config
@@ -72,8 +81,10 @@ CHART_THEME = {
 
 def apply_chart_theme(vega_spec):
     """Merge theme config into Vega-Lite spec, preserving agent's config."""
-    themed = copy.deepcopy(vega_spec)
-    existing = themed.get("config", {})
+    # Only top-level keys and config are modified, so shallow copies suffice;
+    # nested dicts that get merged are rebuilt below rather than mutated
+    themed = dict(vega_spec)
+    existing = dict(vega_spec.get("config", {}))
 
     for key, value in CHART_THEME["config"].items():
         if key not in existing:
@@ -92,21 +103,16 @@ def apply_chart_theme(vega_spec):
 
     return themed
 
+# Markdown escapes applied in one pass; $ renders as a literal dollar sign, not LaTeX
+_MD_ESCAPE = str.maketrans({'$': '\\$'})
+
 def handle_text_response(resp):
-  parts = getattr(resp, 'parts')
-  text = ''.join(parts)
-  # Escape $ signs to render as literal dollar signs, not LaTeX
-  text = text.replace('$', '\\$')
+  text = ''.join(resp.parts).translate(_MD_ESCAPE)
   st.markdown(text)
 
 def display_schema(data):
-  fields = getattr(data, 'fields')
-  df = pd.DataFrame({
-    "Column": map(lambda field: getattr(field, 'name'), fields),
-    "Type": map(lambda field: getattr(field, 'type'), fields),
-    "Description": map(lambda field: getattr(field, 'description', '-'), fields),
-    "Mode": map(lambda field: getattr(field, 'mode'), fields)
-  })
+  rows = [(field.name, field.type, getattr(field, 'description', '-'), field.mode) for field in data.fields]
+  df = pd.DataFrame(rows, columns=["Column", "Type", "Description", "Mode"])
   with st.expander("**Schema**:"):
     st.dataframe(df)
 
@@ -151,34 +157,18 @@ def handle_data_response(resp):
     st.markdown('**Data retrieved:**')
 
     fields = [field.name for field in resp.result.schema.fields]
-    d = {}
-    for el in resp.result.data:
-      for field in fields:
-        if field in d:
-          d[field].append(el[field])
-        else:
-          d[field] = [el[field]]
-
-    df = pd.DataFrame(d)
+    # Rows are proto maps; let pandas assemble the columns in schema order
+    df = pd.DataFrame.from_records([dict(el) for el in resp.result.data], columns=fields)
 
     st.dataframe(df, column_config=build_column_config(df), use_container_width=True)
     st.session_state.lastDataFrame = df
 
 def handle_chart_response(resp):
-  def _convert(v):
-    if isinstance(v, proto.marshal.collections.maps.MapComposite):
-      return {k: _convert(v) for k, v in v.items()}
-    elif isinstance(v, proto.marshal.collections.RepeatedComposite):
-      return [_convert(el) for el in v]
-    elif isinstance(v, (int, float, str, bool)):
-      return v
-    else:
-      return MessageToDict(v)
-
   if 'query' in resp:
     st.markdown(resp.query.instructions)
   elif 'result' in resp:
-    vega_spec = _convert(resp.result.vega_config)
+    # vega_config is a Struct; convert the raw proto in one native call
+    vega_spec = MessageToDict(resp.result._pb.vega_config)
     themed_spec = apply_chart_theme(vega_spec)
     st.vega_lite_chart(themed_spec, use_container_width=True)
 